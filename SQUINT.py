@@ -1,11 +1,37 @@
 # SQUINT.py — v0.1 runner with overlays (strict), path_len check, Floquet expansion,
 # timeline logging, QUA-like output, JSON log, and --simulate
 
-import re, sys, json, random
-from dataclasses import dataclass, field, asdict
-from typing import List, Dict, Tuple, Any, Optional
+import io, re, sys, json, math, random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
+from typing import List, Dict, Tuple, Any, Optional, Sequence
 from pathlib import Path
 
+# Optional fast JSON encoder; stdlib fallback emits the same JSON as before
+def _has_nonfinite(o: Any) -> bool:
+    if isinstance(o, float):
+        return not math.isfinite(o)
+    if isinstance(o, dict):
+        return any(map(_has_nonfinite, o.values()))
+    if isinstance(o, (list, tuple)):
+        return any(map(_has_nonfinite, o))
+    return False
+
+try:
+    import orjson
+    def _dump(obj: Any) -> bytes:
+        # orjson writes NaN/Infinity as null; the stdlib keeps them
+        if not _has_nonfinite(obj):
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+            except TypeError:
+                pass    # e.g. ints beyond 64 bits, which the stdlib encoder handles
+        return json.dumps(obj, indent=2).encode("utf-8")
+except ImportError:
+    def _dump(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2).encode("utf-8")
+
 # ---------- IR ----------
 @dataclass
 class WorkspaceIR:
@@ -33,6 +59,27 @@ class ProgramIR:
     workspace: WorkspaceIR
     kernel: KernelIR
 
+@dataclass(slots=True)
+class TimelineEntry:
+    line: int
+    t: int                                    # ns since program start
+    op: str                                   # "wait", gate, "<gate>@floquet", "measure"
+    ns: int = 0                               # wait length
+    cycle: int = 0                            # Floquet cycle (1-based)
+    targets: Sequence[str] = ()
+    target: str = ""                          # measure target / output
+    out: str = ""
+
+def _te_to_dict(te: TimelineEntry) -> Dict[str, Any]:
+    # JSON form for --log: only the fields this entry kind uses
+    d: Dict[str, Any] = {"line": te.line, "t": te.t, "op": te.op}
+    if te.ns: d["ns"] = te.ns
+    if te.cycle: d["cycle"] = te.cycle
+    if te.targets: d["targets"] = te.targets
+    if te.target: d["target"] = te.target
+    if te.out: d["out"] = te.out
+    return d
+
 # ---------- Parser ----------
 class ParseError(Exception):
     pass
@@ -41,11 +88,19 @@ def _normalize_ascii_ops(s: str) -> str:
     # Allow >= and <= in overlays; normalize to ≥ and ≤
     return s.replace(">=", "≥").replace("<=", "≤")
 
+# Whole-line // comments, newline included so kernel line numbers match the old strip
+_COMMENT_RE = re.compile(r'^[^\S\n]*//[^\n]*\n?', re.M)
+# Line breaks str.splitlines() knows but re's ^/$ do not; such input is normalized to \n first
+_OTHER_BREAKS = re.compile('[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
 _ws_name   = re.compile(r'\bworkspace\s+(\w+)\s*\{', re.I)
 _qubits    = re.compile(r'\bqubits\s+\w+\[(\d+)\]\s*;', re.I)
 _lattice   = re.compile(r'\blattice\s+\w+\(\s*(\d+)\s*,\s*(\d+)\s*\)\s*attach\s+\w+\s*;', re.I)
 _sfield    = re.compile(r'\bsemantic_field\s+(\w+)\s*:\s*(scalar|vector|tensor\[\d+\])\s+on\s+(\w+)\s*;', re.I)
 _dfield    = re.compile(r'\bdefect_field\s+(\w+)\s*:\s*defects\s+on\s+(\w+)\s*\{[^}]*\}\s*;', re.I)
+# Both field rules fused so the workspace block is scanned once
+_ws_fields = re.compile(f"(?P<s>{_sfield.pattern})|(?P<d>{_dfield.pattern})", re.I)
+_WS_S, _WS_D = _ws_fields.groupindex["s"], _ws_fields.groupindex["d"]
 _kernel    = re.compile(r'\bkernel\s+(\w+)\s*(?:\([^)]*\))?\s+on\s+(\w+)\s*\{', re.I)
 
 _stmt_transport = re.compile(r'^\s*transport\s+(\w+)\s*=\s*(.+?)\s*;\s*$', re.I)
@@ -64,28 +119,122 @@ def _parse_overlay(s: str) -> Dict[str, str]:
         return {}
     s = _normalize_ascii_ops(s)
     out: Dict[str, str] = {}
+    # keys are interned so lookups against the literal overlay names hit by identity
     for raw in s.split(','):
         item = raw.strip()
         if not item:
             continue
         if '≥' in item:
             k, v = item.split('≥', 1)
-            out[k.strip()] = f'>={v.strip()}'
+            out[sys.intern(k.strip())] = f'>={v.strip()}'
         elif '≤' in item:
             k, v = item.split('≤', 1)
-            out[k.strip()] = f'<={v.strip()}'
+            out[sys.intern(k.strip())] = f'<={v.strip()}'
         elif '==' in item:
             k, v = item.split('==', 1)
-            out[k.strip()] = v.strip()
+            out[sys.intern(k.strip())] = v.strip()
         elif '=' in item:
             k, v = item.split('=', 1)
-            out[k.strip()] = v.strip()
+            out[sys.intern(k.strip())] = v.strip()
         else:
-            out[item] = 'true'
+            out[sys.intern(item)] = 'true'
     return out
 
+# ---- statement handlers: each takes the rule's own capture groups ----
+def _h_ctrl(g: Tuple, ln_no: int) -> OperationIR:
+    gate, tgts, angle, ov, guard = g
+    args = {"gate": gate, "targets": [t.strip() for t in tgts.split(',')]}
+    if angle:
+        args["angle"] = angle
+    if guard:
+        args["guard"] = guard
+    return OperationIR("quantum", "ctrl", args=args, overlay=_parse_overlay(ov or ''), line=ln_no)
+
+def _h_measure(g: Tuple, ln_no: int) -> OperationIR:
+    t1, t2, o1, o2 = g
+    args = {"targets": [t for t in [t1, t2] if t], "outputs": [o for o in [o1, o2] if o]}
+    return OperationIR("quantum", "measure", args=args, line=ln_no)
+
+def _h_transport(g: Tuple, ln_no: int) -> OperationIR:
+    name, expr = g
+    return OperationIR("semantic", "transport", args={"name": name, "expr": expr}, line=ln_no)
+
+def _h_quench(g: Tuple, ln_no: int) -> OperationIR:
+    name, handle, amount = g
+    return OperationIR("braid", "quench", args={"name": name, "handle": handle, "amount": float(amount)}, line=ln_no)
+
+def _h_observe(g: Tuple, ln_no: int) -> OperationIR:
+    what, into, corr = g
+    corr_map = {}
+    if corr:
+        for kv in corr.split(','):
+            if '=' in kv:
+                k, v = kv.split('=', 1)
+                corr_map[k.strip()] = v.strip()
+    return OperationIR("semantic", "observe", args={"what": what, "into": into, "corrections": corr_map}, line=ln_no)
+
+def _h_init(g: Tuple, ln_no: int) -> OperationIR:
+    name, expr = g
+    return OperationIR("semantic", "initialize", args={"name": name, "expr": expr}, line=ln_no)
+
+def _h_hyst(g: Tuple, ln_no: int) -> OperationIR:
+    handle, window = g
+    a = {"handle": handle}
+    if window:
+        a["window"] = int(window)
+    return OperationIR("semantic", "hysteresis_trace", args=a, line=ln_no)
+
+def _h_relax(g: Tuple, ln_no: int) -> OperationIR:
+    name, rate = g
+    return OperationIR("semantic", "relax", args={"name": name, "rate": rate}, line=ln_no)
+
+def _h_defect_ev(g: Tuple, ln_no: int) -> OperationIR:
+    kind, rest = g
+    return OperationIR("braid", kind.lower(), args={"spec": rest.strip().rstrip(';')}, line=ln_no)
+
+def _h_return(g: Tuple, ln_no: int) -> OperationIR:
+    return OperationIR("semantic", "return", args={"spec": g[0].strip()}, line=ln_no)
+
+# Leading keyword -> (statement regex, handler). Every rule starts with its
+# own keyword, so one dict lookup picks the only regex that can match.
+_KW_TO_RULE = {
+    "ctrl":             (_stmt_ctrl,      _h_ctrl),
+    "measure":          (_stmt_measure,   _h_measure),
+    "transport":        (_stmt_transport, _h_transport),
+    "quench":           (_stmt_quench,    _h_quench),
+    "observe":          (_stmt_observe,   _h_observe),
+    "initialize":       (_stmt_init,      _h_init),
+    "hysteresis_trace": (_stmt_hyst,      _h_hyst),
+    "relax":            (_stmt_relax,     _h_relax),
+    "nucleate":         (_stmt_defect_ev, _h_defect_ev),
+    "pin":              (_stmt_defect_ev, _h_defect_ev),
+    "anneal":           (_stmt_defect_ev, _h_defect_ev),
+    "evolve":           (_stmt_defect_ev, _h_defect_ev),
+    "return":           (_stmt_return,    _h_return),
+}
+_lead_kw = re.compile(r'\w+')
+
+def _match_brace(code: str, i: int) -> int:
+    # i is just past an opening '{'; return the index just past its matching '}'
+    # (-1 if unbalanced). Jumps between braces with str.find.
+    depth = 1
+    while depth:
+        nxt_open = code.find('{', i)
+        nxt_close = code.find('}', i)
+        if nxt_close < 0:
+            return -1
+        if 0 <= nxt_open < nxt_close:
+            depth += 1
+            i = nxt_open + 1
+        else:
+            depth -= 1
+            i = nxt_close + 1
+    return i
+
 def parse(code: str) -> ProgramIR:
-    code = "\n".join(ln for ln in code.splitlines() if not ln.strip().startswith("//"))
+    if _OTHER_BREAKS.search(code):
+        code = "\n".join(code.splitlines())
+    code = _COMMENT_RE.sub('', code)
 
     m = _ws_name.search(code)
     if not m:
@@ -93,12 +242,9 @@ def parse(code: str) -> ProgramIR:
     ws_name = m.group(1)
 
     # workspace block braces
-    i = m.end()
-    depth = 1
-    while i < len(code) and depth:
-        if code[i] == '{': depth += 1
-        elif code[i] == '}': depth -= 1
-        i += 1
+    i = _match_brace(code, m.end())
+    if i < 0:
+        raise ParseError("unbalanced braces")
     ws_block = code[m.end():i-1]
 
     qm = _qubits.search(ws_block)
@@ -111,8 +257,16 @@ def parse(code: str) -> ProgramIR:
         raise ParseError("lattice decl not found (expect: lattice L(x,y) attach q;)")
     lattice = (int(lm.group(1)), int(lm.group(2)))
 
-    sfields = {m.group(1): m.group(2) for m in _sfield.finditer(ws_block)}
-    dfields = [m.group(1) for m in _dfield.finditer(ws_block)]
+    sfields: Dict[str, str] = {}
+    dfields: List[str] = []
+    for fm in _ws_fields.finditer(ws_block):
+        if fm.lastgroup == "s":
+            sfields[fm.group(_WS_S + 1)] = fm.group(_WS_S + 2)
+        else:
+            dfields.append(fm.group(_WS_D + 1))
+            # a defect_field {...} body can hide semantic_field decls; keep them
+            for sm in _sfield.finditer(ws_block, fm.start(), fm.end()):
+                sfields[sm.group(1)] = sm.group(2)
     ws = WorkspaceIR(ws_name, qubits, lattice, sfields, dfields)
 
     # kernel block
@@ -122,12 +276,9 @@ def parse(code: str) -> ProgramIR:
     kname, target_ws = km.group(1), km.group(2)
     if target_ws != ws_name:
         raise ParseError(f"kernel '{kname}' targets workspace '{target_ws}' but workspace is '{ws_name}'")
-    j = km.end()
-    depth = 1
-    while j < len(code) and depth:
-        if code[j] == '{': depth += 1
-        elif code[j] == '}': depth -= 1
-        j += 1
+    j = _match_brace(code, km.end())
+    if j < 0:
+        raise ParseError("unbalanced braces")
     kblock = code[km.end():j-1]
 
     ops: List[OperationIR] = []
@@ -136,82 +287,11 @@ def parse(code: str) -> ProgramIR:
         if not line:
             continue
 
-        m = _stmt_ctrl.match(line)
-        if m:
-            gate = m.group(1)
-            targets = [t.strip() for t in m.group(2).split(',')]
-            angle = m.group(3)
-            overlay = _parse_overlay(m.group(4) or '')
-            guard = m.group(5)
-            args = {"gate": gate, "targets": targets}
-            if angle:
-                args["angle"] = angle
-            if guard:
-                args["guard"] = guard
-            ops.append(OperationIR("quantum", "ctrl", args=args, overlay=overlay, line=ln_no))
-            continue
-
-        m = _stmt_measure.match(line)
-        if m:
-            t1, t2, o1, o2 = m.groups()
-            args = {"targets": [t for t in [t1, t2] if t], "outputs": [o for o in [o1, o2] if o]}
-            ops.append(OperationIR("quantum", "measure", args=args, line=ln_no))
-            continue
-
-        m = _stmt_transport.match(line)
-        if m:
-            name, expr = m.groups()
-            ops.append(OperationIR("semantic", "transport", args={"name": name, "expr": expr}, line=ln_no))
-            continue
-
-        m = _stmt_quench.match(line)
+        kw = _lead_kw.match(line)
+        rule = _KW_TO_RULE.get(kw.group().lower()) if kw else None
+        m = rule[0].match(line) if rule else None
         if m:
-            name, handle, amount = m.groups()
-            ops.append(OperationIR("braid", "quench", args={"name": name, "handle": handle, "amount": float(amount)}, line=ln_no))
-            continue
-
-        m = _stmt_observe.match(line)
-        if m:
-            what, into, corr = m.groups()
-            corr_map = {}
-            if corr:
-                for kv in corr.split(','):
-                    if '=' in kv:
-                        k, v = kv.split('=', 1)
-                        corr_map[k.strip()] = v.strip()
-            ops.append(OperationIR("semantic", "observe", args={"what": what, "into": into, "corrections": corr_map}, line=ln_no))
-            continue
-
-        m = _stmt_init.match(line)
-        if m:
-            name, expr = m.groups()
-            ops.append(OperationIR("semantic", "initialize", args={"name": name, "expr": expr}, line=ln_no))
-            continue
-
-        m = _stmt_hyst.match(line)
-        if m:
-            handle, window = m.groups()
-            a = {"handle": handle}
-            if window:
-                a["window"] = int(window)
-            ops.append(OperationIR("semantic", "hysteresis_trace", args=a, line=ln_no))
-            continue
-
-        m = _stmt_relax.match(line)
-        if m:
-            name, rate = m.groups()
-            ops.append(OperationIR("semantic", "relax", args={"name": name, "rate": rate}, line=ln_no))
-            continue
-
-        m = _stmt_defect_ev.match(line)
-        if m:
-            kind, rest = m.groups()
-            ops.append(OperationIR("braid", kind.lower(), args={"spec": rest.strip().rstrip(';')}, line=ln_no))
-            continue
-
-        m = _stmt_return.match(line)
-        if m:
-            ops.append(OperationIR("semantic", "return", args={"spec": m.group(1).strip()}, line=ln_no))
+            ops.append(rule[1](m.groups(), ln_no))
             continue
 
         raise ParseError(f"Unrecognized statement on line {ln_no}: {line}")
@@ -232,40 +312,73 @@ def _parse_required_ns(v: str) -> Optional[int]:
     m = _re_num_ns.search(v)
     return int(m.group(1)) if m else None
 
+_ETA_PATTERNS = [re.compile(p) for p in (r'η\(Φ=(\w+)\)', r'eta\(Phi=(\w+)\)', r'η\(Phi=(\w+)\)')]
+_Q_NAME_RE = re.compile(r'(\w+)\[(\d+)\]')
+
 def _parse_eta_phi(expr: str) -> Optional[str]:
     # Extract field name from η(Φ=Phi) or eta(Phi=Phi)
     s = (expr or "").replace(" ", "")
-    for pat in [r'η\(Φ=(\w+)\)', r'eta\(Phi=(\w+)\)', r'η\(Phi=(\w+)\)']:
-        m = re.match(pat, s)
+    for pat in _ETA_PATTERNS:
+        m = pat.match(s)
         if m:
             return m.group(1)
     return None
 
-def _q_name_to_xy(name: str, ws: WorkspaceIR) -> Optional[Tuple[int, int]]:
+@lru_cache(maxsize=4096)
+def _q_name_to_xy(name: str, cols: int) -> Optional[Tuple[int, int]]:
     # Map q[i] to lattice coords (row-major): x = i % cols, y = i // cols
-    m = re.match(r'(\w+)\[(\d+)\]', name)
+    m = _Q_NAME_RE.match(name)
     if not m:
         return None
     idx = int(m.group(2))
-    cols = ws.lattice[0]
     return (idx % cols, idx // cols)
 
 def _manhattan(a: str, b: str, ws: WorkspaceIR) -> Optional[int]:
-    A = _q_name_to_xy(a, ws)
-    B = _q_name_to_xy(b, ws)
+    # keyed on the current column count, so a resized lattice is never stale
+    cols = ws.lattice[0]
+    A = _q_name_to_xy(a, cols)
+    B = _q_name_to_xy(b, cols)
     if A is None or B is None:
         return None
     return abs(A[0] - B[0]) + abs(A[1] - B[1])
 
-def check_overlay_constraints(op: dict, workspace: WorkspaceIR) -> Tuple[bool, List[str]]:
+_NO_DIAGS: Tuple[str, ...] = ()
+
+def check_overlay_constraints(op: dict, workspace: WorkspaceIR,
+                              collect_diags: bool = True) -> Tuple[bool, Sequence[str]]:
     """
     Validate overlay for a ctrl operation. op should include keys:
       - "overlay": dict
       - "args": {"targets":[...], ...}
+    Results are memoized on the overlay, target count, target distance and
+    workspace field names, since real kernels repeat the same overlay on
+    many gates. With collect_diags=False only the verdict is computed and
+    diagnostics are ().
     """
     ov = op.get("overlay", {}) or {}
     args = op.get("args", {}) or {}
     tgts = args.get("targets", [])
+    # the only lattice-dependent input: resolve it here so the cache key stays small
+    dist = _manhattan(tgts[0], tgts[1], workspace) if "path_len" in ov and len(tgts) == 2 else None
+    sfields, dfields = tuple(workspace.semantic_fields), tuple(workspace.defect_fields)
+    try:
+        ok, diags = _check_cached(frozenset(ov.items()), len(tgts), dist, sfields, dfields, collect_diags)
+    except TypeError:
+        # unhashable overlay value: validate without the cache
+        ok, diags = _check_overlay(ov, len(tgts), dist, sfields, dfields, collect_diags)
+    return (ok, list(diags)) if collect_diags else (ok, _NO_DIAGS)
+
+@lru_cache(maxsize=4096)
+def _check_cached(overlay_items: frozenset, n_tgts: int, dist: Optional[int],
+                  sfields: Tuple[str, ...], dfields: Tuple[str, ...],
+                  collect: bool) -> Tuple[bool, Tuple[str, ...]]:
+    ok, diags = _check_overlay(dict(overlay_items), n_tgts, dist, sfields, dfields, collect)
+    return ok, tuple(diags)
+
+def _check_overlay(ov: Dict[str, Any], n_tgts: int, dist: Optional[int],
+                   sfields: Tuple[str, ...], dfields: Tuple[str, ...],
+                   collect: bool = True) -> Tuple[bool, List[str]]:
+    # collect=False skips building diagnostic strings; only ok is computed
     diags: List[str] = []
     ok = True
 
@@ -275,26 +388,26 @@ def check_overlay_constraints(op: dict, workspace: WorkspaceIR) -> Tuple[bool, L
         ns = _parse_required_ns(req)
         if ns is None or not str(req).startswith(">="):
             ok = False
-            diags.append(f"coherence_len malformed (got '{req}', expect >=###ns)")
+            if collect: diags.append(f"coherence_len malformed (got '{req}', expect >=###ns)")
         else:
-            diags.append(f"coherence_len satisfied by wait({ns}) insertion")
+            if collect: diags.append(f"coherence_len satisfied by wait({ns}) insertion")
 
     # damping η(Φ=Phi)
     if "damping" in ov:
         f = _parse_eta_phi(ov["damping"])
         if not f:
             ok = False
-            diags.append(f"damping malformed (got '{ov['damping']}', expect η(Φ=Phi) or eta(Phi=Phi))")
-        elif f not in workspace.semantic_fields:
+            if collect: diags.append(f"damping malformed (got '{ov['damping']}', expect η(Φ=Phi) or eta(Phi=Phi))")
+        elif f not in sfields:
             ok = False
-            diags.append(f"damping references missing semantic field '{f}'")
+            if collect: diags.append(f"damping references missing semantic field '{f}'")
 
     # braid handle
     if "braid" in ov:
         handle = ov["braid"]
-        if handle not in workspace.defect_fields:
+        if handle not in dfields:
             ok = False
-            diags.append(f"braid handle '{handle}' not declared in defect fields {workspace.defect_fields}")
+            if collect: diags.append(f"braid handle '{handle}' not declared in defect fields {list(dfields)}")
 
     # path_len ≤ k  (only meaningful for 2-qubit gates)
     if "path_len" in ov:
@@ -305,18 +418,17 @@ def check_overlay_constraints(op: dict, workspace: WorkspaceIR) -> Tuple[bool, L
         except Exception:
             k, ok_req = None, False
 
-        if not ok_req or len(tgts) != 2 or k is None:
+        if not ok_req or n_tgts != 2 or k is None:
             ok = False
-            diags.append(f"path_len malformed (got '{req}', expect <=k on 2-qubit op)")
+            if collect: diags.append(f"path_len malformed (got '{req}', expect <=k on 2-qubit op)")
         else:
-            d = _manhattan(tgts[0], tgts[1], workspace)
-            if d is None:
-                diags.append("path_len check skipped (couldn’t map targets to lattice)")
-            elif d > k:
+            if dist is None:
+                if collect: diags.append("path_len check skipped (couldn’t map targets to lattice)")
+            elif dist > k:
                 ok = False
-                diags.append(f"path_len ≤ {k} violated (distance={d})")
+                if collect: diags.append(f"path_len ≤ {k} violated (distance={dist})")
             else:
-                diags.append(f"path_len satisfied (distance={d} ≤ {k})")
+                if collect: diags.append(f"path_len satisfied (distance={dist} ≤ {k})")
 
     # --- Floquet overlays: floquet_period, cycles, duty, phase_step ---
     if "floquet_period" in ov:
@@ -327,46 +439,58 @@ def check_overlay_constraints(op: dict, workspace: WorkspaceIR) -> Tuple[bool, L
         try:
             p_ns = int(float(s))
             if p_ns <= 0: raise ValueError
-            diags.append(f"floquet_period accepted: {p_ns} ns")
+            if collect: diags.append(f"floquet_period accepted: {p_ns} ns")
         except Exception:
             ok = False
-            diags.append(f"floquet_period malformed (got '{p}', expect e.g. 50ns)")
+            if collect: diags.append(f"floquet_period malformed (got '{p}', expect e.g. 50ns)")
     if "cycles" in ov:
         try:
             cyc = int(str(ov["cycles"]))
             if cyc <= 0: raise ValueError
-            diags.append(f"cycles accepted: {cyc}")
+            if collect: diags.append(f"cycles accepted: {cyc}")
         except Exception:
             ok = False
-            diags.append(f"cycles malformed (got '{ov['cycles']}', expect positive integer)")
+            if collect: diags.append(f"cycles malformed (got '{ov['cycles']}', expect positive integer)")
     if "duty" in ov:
         try:
             duty = float(str(ov["duty"]))
             if not (0.0 < duty <= 1.0): raise ValueError
-            diags.append(f"duty accepted: {duty}")
+            if collect: diags.append(f"duty accepted: {duty}")
         except Exception:
             ok = False
-            diags.append(f"duty malformed (got '{ov['duty']}', expect 0<duty<=1)")
+            if collect: diags.append(f"duty malformed (got '{ov['duty']}', expect 0<duty<=1)")
     if "phase_step" in ov:
         s = str(ov["phase_step"]).lower().strip()
         if s.endswith("deg"): s = s[:-3]
         try:
             float(s)
-            diags.append(f"phase_step accepted: {ov['phase_step']}")
+            if collect: diags.append(f"phase_step accepted: {ov['phase_step']}")
         except Exception:
             ok = False
-            diags.append(f"phase_step malformed (got '{ov['phase_step']}', expect e.g. 15deg)")
+            if collect: diags.append(f"phase_step malformed (got '{ov['phase_step']}', expect e.g. 15deg)")
 
     # Recognized but not enforced (future work)
     for k in ("span", "coherence_budget"):
         if k in ov:
-            diags.append(f"{k} overlay recognized but not enforced in v0.1 stub")
+            if collect: diags.append(f"{k} overlay recognized but not enforced in v0.1 stub")
 
     return ok, diags
 
 # ---------- QUA-like exporter (with timeline + Floquet) ----------
-def _emit_wait_ns(ns: int) -> str:
-    return f"    wait({ns})"
+_WAIT        = "    wait(%d)"
+_PLAY_RX     = "    play('rx', {}, angle={})"
+_PLAY_1Q     = "    play('{}', {})"
+_PLAY_2Q     = "    play('{}', {}, control={})"
+_UNSUPPORTED = "    # unsupported gate '{}' on {}"
+
+# gate name -> formatter(targets, angle); unknown gates fall back to _UNSUPPORTED
+_GATE_EMIT = {
+    "rx": lambda tg, an: _PLAY_RX.format(tg[0], an),
+    "x":  lambda tg, an: _PLAY_1Q.format("x", tg[0]),
+    "h":  lambda tg, an: _PLAY_1Q.format("h", tg[0]),
+    "cx": lambda tg, an: _PLAY_2Q.format("cnot", tg[0], tg[1]),
+    "cz": lambda tg, an: _PLAY_2Q.format("cz", tg[0], tg[1]),
+}
 
 def _ns_from_overlay(v: Any) -> Optional[int]:
     if isinstance(v, str) and v.startswith(">=") and v.endswith("ns"):
@@ -376,9 +500,49 @@ def _ns_from_overlay(v: Any) -> Optional[int]:
             return None
     return None
 
+def _ns_from_any(v: Any) -> Optional[int]:
+    # "50ns" / "50" / 50 -> 50
+    if v is None: return None
+    s = str(v)
+    if s.endswith("ns"): s = s[:-2]
+    try: return int(float(s))
+    except: return None
+
+# any of these on a ctrl turns on Floquet expansion
+_FLOQUET_KEYS = frozenset(("floquet_period", "cycles", "duty"))
+
+def _to_num(v: Any, conv) -> Optional[Any]:
+    try: return conv(float(v))
+    except (TypeError, ValueError, OverflowError): return None
+
+def _overlay_fields(ov: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed view of the overlay values compile_to_qua consumes, converted once
+    per op from the live overlay. A key is present only if its overlay is;
+    None = malformed.
+      coherence_len_ns, floquet_period_ns, cycles (int), duty (float)
+    """
+    out: Dict[str, Any] = {}
+    if "coherence_len" in ov:
+        out["coherence_len_ns"] = _ns_from_overlay(ov["coherence_len"])
+    if "floquet_period" in ov:
+        out["floquet_period_ns"] = _ns_from_any(ov["floquet_period"])
+    if "cycles" in ov:
+        out["cycles"] = _to_num(ov["cycles"], int)
+    if "duty" in ov:
+        out["duty"] = _to_num(ov["duty"], float)
+    return out
+
+def _flush_diags(buf: List[str]) -> None:
+    if buf:
+        sys.stdout.write("\n".join(buf))
+        sys.stdout.write("\n")
+        buf.clear()
+
 def compile_to_qua(prog: ProgramIR) -> str:
     ws, krn = prog.workspace, prog.kernel
     strict = getattr(prog, "_strict_overlays", False)
+    verbose = getattr(prog, "_verbose_overlays", True)
 
     lines: List[str] = []
     lines.append("program = QUAProgram()")
@@ -387,113 +551,93 @@ def compile_to_qua(prog: ProgramIR) -> str:
 
     # simple timeline (MUST be initialized before use)
     time_ns = 0
-    timeline: List[Dict[str, Any]] = []
-
-    for op in krn.operations:
-        if op.kind == "quantum" and op.op == "ctrl":
-            gate = op.args["gate"].lower()
-            tgts = op.args["targets"]
-            angle = op.args.get("angle")
-
-            # Validate overlays
-            ok, diags = check_overlay_constraints({"overlay": op.overlay, "args": op.args}, ws)
-            for d in diags:
-                print(f"ℹ️  overlay[{op.line}]: {d}")
-            if not ok and strict:
-                raise OverlayError(f"Overlay unsatisfied on line {op.line}: {'; '.join(diags)}", op_line=op.line)
-
-            # Apply coherence_len → wait(ns)
-            coh = op.overlay.get("coherence_len")
-            wait_needed = _ns_from_overlay(coh)
-            if coh and wait_needed is None:
-                print(f"⚠️  overlay coherence_len not understood: {coh} (expect >=###ns)")
-            if wait_needed:
-                lines.append(_emit_wait_ns(wait_needed))
-                timeline.append({"line": op.line, "t": time_ns, "op": "wait", "ns": wait_needed})
-                time_ns += wait_needed
-
-            # ----- Floquet expansion (optional) -----
-            if ("floquet_period" in op.overlay) or ("cycles" in op.overlay) or ("duty" in op.overlay):
-                # Parse numbers
-                def _ns_from_any(v):
-                    if v is None: return None
-                    s = str(v)
-                    if s.endswith("ns"): s = s[:-2]
-                    try: return int(float(s))
-                    except: return None
-                period_ns = _ns_from_any(op.overlay.get("floquet_period"))
-                cycles    = int(float(op.overlay.get("cycles", 1)))
-                duty_f    = float(op.overlay.get("duty", 0.5))
-                ps        = str(op.overlay.get("phase_step", "0deg"))  # informational
-
-                if period_ns is None or cycles <= 0 or not (0.0 < duty_f <= 1.0):
-                    print(f"⚠️  Floquet parameters malformed (period={op.overlay.get('floquet_period')}, cycles={op.overlay.get('cycles')}, duty={op.overlay.get('duty')}) — emitting single pulse.")
-                    # Fall back to single play
-                    if gate == "rx":
-                        lines.append(f"    play('rx', {tgts[0]}, angle={angle})")
-                    elif gate == "x":
-                        lines.append(f"    play('x', {tgts[0]})")
-                    elif gate == "h":
-                        lines.append(f"    play('h', {tgts[0]})")
-                    elif gate == "cx":
-                        lines.append(f"    play('cnot', {tgts[0]}, control={tgts[1]})")
-                    elif gate == "cz":
-                        lines.append(f"    play('cz', {tgts[0]}, control={tgts[1]})")
+    timeline: List[TimelineEntry] = []
+    # stdout diagnostics, written in one go however the op loop exits
+    diag_buf: List[str] = []
+
+    try:
+        for op in krn.operations:
+            if op.kind == "quantum" and op.op == "ctrl":
+                gate = op.args["gate"].lower()
+                tgts = op.args["targets"]
+                angle = op.args.get("angle")
+                ov = op.overlay
+                fields = _overlay_fields(ov) if ov else {}
+
+                # Validate overlays (nothing to check on a bare ctrl)
+                if ov:
+                    ok, diags = check_overlay_constraints({"overlay": ov, "args": op.args}, ws,
+                                                          collect_diags=(strict or verbose))
+                    if verbose:
+                        for d in diags:
+                            diag_buf.append(f"ℹ️  overlay[{op.line}]: {d}")
+                    if not ok and strict:
+                        raise OverlayError(f"Overlay unsatisfied on line {op.line}: {'; '.join(diags)}", op_line=op.line)
+
+                # Apply coherence_len → wait(ns)
+                coh = ov.get("coherence_len")
+                wait_needed = fields.get("coherence_len_ns")
+                if coh and wait_needed is None:
+                    diag_buf.append(f"⚠️  overlay coherence_len not understood: {coh} (expect >=###ns)")
+                if wait_needed:
+                    lines.append(_WAIT % wait_needed)
+                    timeline.append(TimelineEntry(op.line, time_ns, "wait", ns=wait_needed))
+                    time_ns += wait_needed
+
+                # Gate emission is the same line for every path below
+                emit = _GATE_EMIT.get(gate)
+                play = emit(tgts, angle) if emit else _UNSUPPORTED.format(gate, tgts)
+
+                # ----- Floquet expansion (optional) -----
+                if not ov.keys().isdisjoint(_FLOQUET_KEYS):
+                    # Parse numbers
+                    period_ns = fields.get("floquet_period_ns")
+                    cycles    = fields.get("cycles", 1)
+                    duty_f    = fields.get("duty", 0.5)
+                    ps        = str(ov.get("phase_step", "0deg"))  # informational
+
+                    if period_ns is None or cycles is None or cycles <= 0 or duty_f is None or not (0.0 < duty_f <= 1.0):
+                        diag_buf.append(f"⚠️  Floquet parameters malformed (period={ov.get('floquet_period')}, cycles={ov.get('cycles')}, duty={ov.get('duty')}) — emitting single pulse.")
+                        # Fall back to single play
+                        lines.append(play)
+                        timeline.append(TimelineEntry(op.line, time_ns, gate, targets=tgts))
                     else:
-                        lines.append(f"    # unsupported gate '{gate}' on {tgts}")
-                    timeline.append({"line": op.line, "t": time_ns, "op": gate, "targets": tgts})
-                else:
-                    on_ns  = int(round(period_ns * duty_f))
-                    off_ns = max(0, period_ns - on_ns)
-                    lines.append(f"    # floquet: period={period_ns}ns, cycles={cycles}, duty={duty_f}, phase_step={ps}")
-                    for c in range(cycles):
-                        # ON window: emit the gate
-                        if gate == "rx":
-                            lines.append(f"    play('rx', {tgts[0]}, angle={angle})")
-                        elif gate == "x":
-                            lines.append(f"    play('x', {tgts[0]})")
-                        elif gate == "h":
-                            lines.append(f"    play('h', {tgts[0]})")
-                        elif gate == "cx":
-                            lines.append(f"    play('cnot', {tgts[0]}, control={tgts[1]})")
-                        elif gate == "cz":
-                            lines.append(f"    play('cz', {tgts[0]}, control={tgts[1]})")
-                        else:
-                            lines.append(f"    # unsupported gate '{gate}' on {tgts}")
-                        timeline.append({"line": op.line, "t": time_ns, "op": f"{gate}@floquet", "cycle": c+1, "targets": tgts})
-                        # OFF window: wait remainder of the period
+                        on_ns  = int(round(period_ns * duty_f))
+                        off_ns = max(0, period_ns - on_ns)
+                        lines.append(f"    # floquet: period={period_ns}ns, cycles={cycles}, duty={duty_f}, phase_step={ps}")
+                        # Each cycle: ON window emits the gate, OFF window waits the remainder
+                        fl_op = f"{gate}@floquet"
                         if off_ns > 0:
-                            lines.append(_emit_wait_ns(off_ns))
-                            timeline.append({"line": op.line, "t": time_ns, "op": "wait", "ns": off_ns, "cycle": c+1})
-                            time_ns += off_ns
-            else:
-                # ----- Single-shot emission (existing behavior) -----
-                if gate == "rx":
-                    lines.append(f"    play('rx', {tgts[0]}, angle={angle})")
-                elif gate == "x":
-                    lines.append(f"    play('x', {tgts[0]})")
-                elif gate == "h":
-                    lines.append(f"    play('h', {tgts[0]})")
-                elif gate == "cx":
-                    lines.append(f"    play('cnot', {tgts[0]}, control={tgts[1]})")
-                elif gate == "cz":
-                    lines.append(f"    play('cz', {tgts[0]}, control={tgts[1]})")
+                            lines.extend([play, _WAIT % off_ns] * cycles)
+                            timeline.extend([ev for c in range(1, cycles + 1) for ev in (
+                                TimelineEntry(op.line, time_ns + (c - 1) * off_ns, fl_op, cycle=c, targets=tgts),
+                                TimelineEntry(op.line, time_ns + (c - 1) * off_ns, "wait", ns=off_ns, cycle=c),
+                            )])
+                            time_ns += cycles * off_ns
+                        else:
+                            lines.extend([play] * cycles)
+                            timeline.extend([TimelineEntry(op.line, time_ns, fl_op, cycle=c, targets=tgts)
+                                             for c in range(1, cycles + 1)])
                 else:
-                    lines.append(f"    # unsupported gate '{gate}' on {tgts}")
-                timeline.append({"line": op.line, "t": time_ns, "op": gate, "targets": tgts})
-
-        elif op.kind == "quantum" and op.op == "measure":
-            tgts = op.args["targets"]
-            outs = op.args["outputs"]
-            for t, o in zip(tgts, outs):
-                lines.append(f"    measure({t}) -> {o}")
-                timeline.append({"line": op.line, "t": time_ns, "op": "measure", "target": t, "out": o})
-
-        elif op.kind == "semantic":
-            lines.append(f"    # semantic:{op.op} {op.args}")
-
-        elif op.kind == "braid":
-            lines.append(f"    # braid:{op.op} {op.args}")
+                    # ----- Single-shot emission (existing behavior) -----
+                    lines.append(play)
+                    timeline.append(TimelineEntry(op.line, time_ns, gate, targets=tgts))
+
+            elif op.kind == "quantum" and op.op == "measure":
+                tgts = op.args["targets"]
+                outs = op.args["outputs"]
+                for t, o in zip(tgts, outs):
+                    lines.append(f"    measure({t}) -> {o}")
+                    timeline.append(TimelineEntry(op.line, time_ns, "measure", target=t, out=o))
+
+            elif op.kind == "semantic":
+                lines.append(f"    # semantic:{op.op} {op.args}")
+
+            elif op.kind == "braid":
+                lines.append(f"    # braid:{op.op} {op.args}")
+    finally:
+        # also on errors, so diagnostics leading up to a failure still show
+        _flush_diags(diag_buf)
 
     lines.append("end_program()")
 
@@ -505,7 +649,11 @@ def compile_to_qua(prog: ProgramIR) -> str:
 _num_in_tuple = re.compile(r'\((-?\d+)\s*,\s*(-?\d+)\)')
 
 def _coords_from_spec(spec: str):
-    return [(int(x), int(y)) for x, y in _num_in_tuple.findall(spec)]
+    # flat int stream paired back up by zip over one iterator: no per-pair Python frame
+    it = map(int, chain.from_iterable(_num_in_tuple.findall(spec)))
+    return list(zip(it, it))
+
+_re_constant = re.compile(r'constant\(([^)]+)\)')
 
 def simulate(prog: ProgramIR) -> Dict[str, Any]:
     random.seed(42)
@@ -517,7 +665,7 @@ def simulate(prog: ProgramIR) -> Dict[str, Any]:
     for op in prog.kernel.operations:
         if op.kind == "semantic" and op.op == "initialize":
             if op.args["name"] == "Phi":
-                m = re.search(r'constant\(([^)]+)\)', op.args["expr"])
+                m = _re_constant.search(op.args["expr"])
                 if m:
                     phi_base = float(m.group(1))
                 state["fields"]["Phi"] = {"base": phi_base}
@@ -577,6 +725,7 @@ def _parse_cli(argv: List[str]):
     want_log = False
     want_sim = False
     strict_ov = False
+    quiet_ov = False
     it = iter(argv)
     other: List[str] = []
     for a in it:
@@ -588,14 +737,21 @@ def _parse_cli(argv: List[str]):
             want_sim = True
         elif a == "--strict-overlays":
             strict_ov = True
+        elif a == "--quiet-overlays":
+            quiet_ov = True
         else:
             other.append(a)
     if other:
         src = other[0]
-    return src, out, want_log, want_sim, strict_ov
+    return src, out, want_log, want_sim, strict_ov, quiet_ov
+
+def _ws_to_dict(ws: WorkspaceIR) -> Dict[str, Any]:
+    # Shallow, JSON-ready copy of the workspace (asdict() deep-copies recursively)
+    return {"name": ws.name, "qubits": ws.qubits, "lattice": list(ws.lattice),
+            "semantic_fields": dict(ws.semantic_fields), "defect_fields": list(ws.defect_fields)}
 
 def main():
-    src_arg, out_arg, want_log, want_sim, strict_ov = _parse_cli(sys.argv[1:])
+    src_arg, out_arg, want_log, want_sim, strict_ov, quiet_ov = _parse_cli(sys.argv[1:])
     src = Path(src_arg) if src_arg else Path("CalibratedEPR.squint")
 
     try:
@@ -613,6 +769,7 @@ def main():
         return
 
     setattr(prog, "_strict_overlays", strict_ov)
+    setattr(prog, "_verbose_overlays", not quiet_ov)
 
     print("🧠 Parsed Workspace:", prog.workspace.name)
     print("   Qubits:", prog.workspace.qubits, "Lattice:", prog.workspace.lattice)
@@ -634,12 +791,12 @@ def main():
         events = [{"kind": o.kind, "op": o.op, "line": o.line, "args": o.args, "overlay": o.overlay}
                   for o in prog.kernel.operations]
         payload = {
-            "workspace": asdict(prog.workspace),
+            "workspace": _ws_to_dict(prog.workspace),
             "kernel": prog.kernel.name,
             "events": events,
-            "timeline": getattr(prog, "_timeline", [])
+            "timeline": [_te_to_dict(te) for te in getattr(prog, "_timeline", [])]
         }
-        log_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        log_path.write_bytes(_dump(payload))
         print(f"🧾 Log: {log_path}")
 
     # Optional simulator
@@ -647,47 +804,49 @@ def main():
         sim = simulate(prog)
         sim_json = src.with_suffix(".sim.json")
         sim_txt  = src.with_suffix(".sim.txt")
-        sim_json.write_text(json.dumps(sim, indent=2), encoding="utf-8")
-
-        lines = []
-        lines.append("🚀 ENHANCED EXECUTION WITH SEMANTIC FIELD SIMULATION")
-        lines.append("============================================================\n")
-        lines.append("🎯 SEMANTIC FIELD SIMULATION RESULTS")
-        lines.append("============================================================")
+        sim_json.write_bytes(_dump(sim))
+
+        buf = io.StringIO()
+        w = buf.write
+        w("🚀 ENHANCED EXECUTION WITH SEMANTIC FIELD SIMULATION\n")
+        w("============================================================\n\n")
+        w("🎯 SEMANTIC FIELD SIMULATION RESULTS\n")
+        w("============================================================\n")
         if "Phi" in sim["fields"]:
-            lines.append(f"   🌐 Initialized field 'Phi' = {sim['fields']['Phi']['base']}")
+            w(f"   🌐 Initialized field 'Phi' = {sim['fields']['Phi']['base']}\n")
         if "D" in sim["defects"]:
             coords = sim['defects']['D']['coords']
-            lines.append(f"   🔷 Nucleated D at {coords}")
-            lines.append(f"   🔄 Evolved D: density 0.0100→{sim['defects']['D']['density']:.4f}, "
-                         f"phase: {sim['defects']['D']['phase']:.2f} rad")
-            lines.append(f"   ❄️ Quenched D: density now {sim['defects']['D']['density']:.4f}")
+            w(f"   🔷 Nucleated D at {coords}\n")
+            w(f"   🔄 Evolved D: density 0.0100→{sim['defects']['D']['density']:.4f}, "
+              f"phase: {sim['defects']['D']['phase']:.2f} rad\n")
+            w(f"   ❄️ Quenched D: density now {sim['defects']['D']['density']:.4f}\n")
         if sim["latest_obs"]:
             Te   = sim["latest_obs"]["T_eff"]
             base = sim["latest_obs"]["base"]
             dt   = sim["latest_obs"]["defects_term"]
             ft   = sim["latest_obs"]["field_term"]
-            lines.append(f"   🌡️ Observed T_eff → {sim['latest_obs']['into']} = {Te} "
-                         f"(base: {base:.2f} + defects: {dt:.4f} + field: {ft:.4f})")
+            w(f"   🌡️ Observed T_eff → {sim['latest_obs']['into']} = {Te} "
+              f"(base: {base:.2f} + defects: {dt:.4f} + field: {ft:.4f})\n")
         ht = [ev for ev in sim["events"] if ev["op"] == "hysteresis"]
         if ht:
             tr = ht[-1]["trace"]
-            lines.append(f"   📈 Hysteresis trace for D: {len(tr)} points, range [{min(tr):.4f}, {max(tr):.4f}]")
+            w(f"   📈 Hysteresis trace for D: {len(tr)} points, range [{min(tr):.4f}, {max(tr):.4f}]\n")
         if sim["measurements"]:
             m = sim["measurements"]
-            lines.append(f"   📤 Return: {sim['latest_obs']['into']} = {Te}, "
-                         f"m0={m.get('m0','?')}, m1={m.get('m1','?')}, m0⊕m1={(m.get('m0',0))^(m.get('m1',0))}")
+            w(f"   📤 Return: {sim['latest_obs']['into']} = {Te}, "
+              f"m0={m.get('m0','?')}, m1={m.get('m1','?')}, m0⊕m1={(m.get('m0',0))^(m.get('m1',0))}\n")
             for k, v in m.items():
-                lines.append(f"   📊 Measured {k} = {v}")
+                w(f"   📊 Measured {k} = {v}\n")
 
-        lines.append("\n📊 FINAL STATE:")
-        lines.append(f"   Fields: {list(sim['fields'].keys())}")
-        lines.append(f"   Defects: {list(sim['defects'].keys())}")
-        lines.append(f"   Measurements: {sim['measurements']}")
+        w("\n📊 FINAL STATE:\n")
+        w(f"   Fields: {list(sim['fields'].keys())}\n")
+        w(f"   Defects: {list(sim['defects'].keys())}\n")
+        w(f"   Measurements: {sim['measurements']}\n")
         if sim["latest_obs"]:
-            lines.append(f"   Latest observation: {sim['latest_obs']['into']} = {sim['latest_obs']['T_eff']}")
-        sim_txt.write_text("\n".join(lines), encoding="utf-8")
-        print("\n".join(lines))
+            w(f"   Latest observation: {sim['latest_obs']['into']} = {sim['latest_obs']['T_eff']}\n")
+        report = buf.getvalue()[:-1]      # no trailing newline, as before
+        sim_txt.write_text(report, encoding="utf-8")
+        print(report)
         print(f"\n💾 Simulation data: {sim_json}")
         print(f"💾 Simulation report: {sim_txt}")
 
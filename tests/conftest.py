@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# SQUINT.py lives at the repo root (not packaged yet)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,87 @@
+import pytest
+
+import SQUINT
+
+_CODE = """workspace W {
+  qubits q[4]; lattice L(2,2) attach q;
+  semantic_field Phi : scalar on L;
+  defect_field D : defects on L { };
+}
+kernel K on W {
+  ctrl x q[0] with overlay { coherence_len >= 80ns };
+  ctrl cx q[0], q[3] with overlay { path_len <= 1 };
+}
+"""
+
+def test_quiet_strict_still_raises_with_diagnostics(capsys):
+    prog = SQUINT.parse(_CODE)
+    setattr(prog, "_strict_overlays", True)
+    setattr(prog, "_verbose_overlays", False)
+    with pytest.raises(SQUINT.OverlayError) as exc:
+        SQUINT.compile_to_qua(prog)
+    assert exc.value.op_line == 3
+    assert "path_len ≤ 1 violated (distance=2)" in str(exc.value)
+    assert "overlay[" not in capsys.readouterr().out
+
+# (overlay, 1-qubit result, 2-qubit q[0],q[3] result) on _CODE's workspace
+_CASES = [
+    ({"coherence_len": ">=80ns"}, (True, ["coherence_len satisfied by wait(80) insertion"]), None),
+    ({"coherence_len": "<=80ns"}, (False, ["coherence_len malformed (got '<=80ns', expect >=###ns)"]), None),
+    ({"damping": "η(Φ=Phi)"}, (True, []), None),
+    ({"damping": "eta(Phi=Missing)"}, (False, ["damping references missing semantic field 'Missing'"]), None),
+    ({"damping": "0.9"}, (False, ["damping malformed (got '0.9', expect η(Φ=Phi) or eta(Phi=Phi))"]), None),
+    ({"braid": "D"}, (True, []), None),
+    ({"braid": "E"}, (False, ["braid handle 'E' not declared in defect fields ['D']"]), None),
+    ({"path_len": "<=4"}, (False, ["path_len malformed (got '<=4', expect <=k on 2-qubit op)"]),
+                          (True, ["path_len satisfied (distance=2 ≤ 4)"])),
+    ({"path_len": "<=1"}, None, (False, ["path_len ≤ 1 violated (distance=2)"])),
+    ({"floquet_period": "100ns", "cycles": "3", "duty": "0.5", "phase_step": "15deg"},
+     (True, ["floquet_period accepted: 100 ns", "cycles accepted: 3", "duty accepted: 0.5",
+             "phase_step accepted: 15deg"]), None),
+    ({"phase_step": "quarter"}, (False, ["phase_step malformed (got 'quarter', expect e.g. 15deg)"]), None),
+    ({"span": "L"}, (True, ["span overlay recognized but not enforced in v0.1 stub"]), None),
+]
+
+def test_cached_validator_results():
+    ws = SQUINT.parse(_CODE).workspace
+    for ov, one_q, two_q in _CASES:
+        for tgts, expected in ((["q[0]"], one_q), (["q[0]", "q[3]"], two_q or one_q)):
+            if expected is None:
+                continue
+            op = {"overlay": ov, "args": {"targets": tgts}}
+            for _ in range(2):      # miss, then hit
+                assert SQUINT.check_overlay_constraints(op, ws) == expected, ov
+            assert SQUINT.check_overlay_constraints(op, ws, collect_diags=False) == (expected[0], ())
+
+def test_cache_key_tracks_workspace_fields():
+    op = {"overlay": {"damping": "η(Φ=Phi)", "braid": "D"}, "args": {"targets": ["q[0]"]}}
+    declared = SQUINT.WorkspaceIR("W", 4, (2, 2), {"Phi": "scalar"}, ["D"])
+    bare = SQUINT.WorkspaceIR("W", 4, (2, 2), {}, [])
+    assert SQUINT.check_overlay_constraints(op, declared) == (True, [])
+    assert SQUINT.check_overlay_constraints(op, bare) == (False, [
+        "damping references missing semantic field 'Phi'",
+        "braid handle 'D' not declared in defect fields []"])
+
+def test_same_overlay_on_many_qubits_hits_cache():
+    ws = SQUINT.WorkspaceIR("W", 64, (8, 8), {}, [])
+    ov = {"coherence_len": ">=123ns"}
+    before = SQUINT._check_cached.cache_info()
+    for i in range(64):
+        SQUINT.check_overlay_constraints({"overlay": ov, "args": {"targets": [f"q[{i}]"]}}, ws)
+    after = SQUINT._check_cached.cache_info()
+    assert (after.misses - before.misses, after.hits - before.hits) == (1, 63)
+
+def test_path_len_follows_lattice_changes():
+    ws = SQUINT.WorkspaceIR("W", 4, (4, 1), {}, [])
+    op = {"overlay": {"path_len": "<=1"}, "args": {"targets": ["q[0]", "q[2]"]}}
+    assert SQUINT.check_overlay_constraints(op, ws) == (False, ["path_len ≤ 1 violated (distance=2)"])
+    ws.lattice = (2, 2)
+    assert SQUINT.check_overlay_constraints(op, ws) == (True, ["path_len satisfied (distance=1 ≤ 1)"])
+
+def test_malformed_floquet_numbers_fall_back_to_single_pulse(capsys):
+    prog = SQUINT.parse("workspace W { qubits q[4]; lattice L(2,2) attach q; }\nkernel K on W {\n"
+                        "ctrl x q[0] with overlay { floquet_period=100ns, cycles=abc, duty=0.5 };\n"
+                        "ctrl x q[1] with overlay { floquet_period=100ns, cycles=2, duty=half };\n}\n")
+    qua = SQUINT.compile_to_qua(prog)
+    assert "    play('x', q[0])\n    play('x', q[1])\n" in qua
+    assert capsys.readouterr().out.count("Floquet parameters malformed") == 2
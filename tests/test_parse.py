@@ -0,0 +1,84 @@
+import pytest
+
+import SQUINT
+
+def _ws(decls):
+    code = "workspace W { qubits q[4]; lattice L(2,2) attach q; " + decls + " }\nkernel K on W {\n}\n"
+    return SQUINT.parse(code).workspace
+
+def test_fields_inside_defect_body_still_declared():
+    ws = _ws("semantic_field Phi : scalar on L; "
+             "defect_field D : defects on L { semantic_field Psi : scalar on L; }; "
+             "semantic_field Chi : vector on L;")
+    assert ws.semantic_fields == {"Phi": "scalar", "Psi": "scalar", "Chi": "vector"}
+    assert ws.defect_fields == ["D"]
+
+def test_comment_strip_handles_non_lf_line_breaks():
+    code = "// c\nworkspace W {\n qubits q[4]; lattice L(2,2) attach q;\n}\n// k\nkernel K on W {\n// x\nctrl x q[0];\n}\n"
+    expected = [(o.op, o.line) for o in SQUINT.parse(code).kernel.operations]
+    for sep in ("\r", "\r\n", "\v", "\f", "\x1c", "\x85", "\u2028", "\u2029"):
+        ops = SQUINT.parse(code.replace("\n", sep)).kernel.operations
+        assert [(o.op, o.line) for o in ops] == expected, repr(sep)
+
+
+# The pre-dispatch parser: every rule tried in this order, first match wins
+_SEQUENTIAL_RULES = [
+    (SQUINT._stmt_ctrl, SQUINT._h_ctrl),
+    (SQUINT._stmt_measure, SQUINT._h_measure),
+    (SQUINT._stmt_transport, SQUINT._h_transport),
+    (SQUINT._stmt_quench, SQUINT._h_quench),
+    (SQUINT._stmt_observe, SQUINT._h_observe),
+    (SQUINT._stmt_init, SQUINT._h_init),
+    (SQUINT._stmt_hyst, SQUINT._h_hyst),
+    (SQUINT._stmt_relax, SQUINT._h_relax),
+    (SQUINT._stmt_defect_ev, SQUINT._h_defect_ev),
+    (SQUINT._stmt_return, SQUINT._h_return),
+]
+
+_LINES = [
+    "ctrl x q[0];",
+    "CTRL rx q[1] angle=pi/2 with overlay { coherence_len >= 80ns } unless m0;",
+    "ctrl cx q[0], q[1] with overlay {path_len<=2};",
+    "ctrl_x q[0];",
+    "measure q[0], q[1] -> m0, m1;",
+    "transport Psi = grad(Phi);",
+    "quench dq = inject(D, amount=0.02);",
+    "observe T_eff into Te with corrections { a=1, b=2 };",
+    "initialize Phi = constant(1.0);",
+    "hysteresis_trace(D, window=5);",
+    "hysteresis_trace (D);",
+    "RELAX S(rate=1);",
+    "nucleate D at {(0,0),(1,1)};",
+    "Evolve D with rule braid_exchange(rate=0.7);",
+    "pin D;",
+    "pinD;",
+    "return { Te, m0 };",
+    "return{ a };",
+    "(bad)",
+    "foo bar;",
+]
+
+def _sequential(line):
+    for rx, handler in _SEQUENTIAL_RULES:
+        m = rx.match(line)
+        if m:
+            return handler(m.groups(), 2)      # kernel body starts after the "{" line
+    return None
+
+def _dispatched(line):
+    try:
+        ops = SQUINT.parse("workspace W { qubits q[4]; lattice L(2,2) attach q; }\n"
+                           "kernel K on W {\n" + line + "\n}\n").kernel.operations
+    except SQUINT.ParseError:
+        return None
+    return ops[0]
+
+def test_keyword_dispatch_matches_sequential_rules():
+    for line in _LINES:
+        assert _dispatched(line) == _sequential(line), line
+
+def test_unbalanced_braces_rejected():
+    for code in ("workspace W { qubits q[4]; lattice L(2,2) attach q; }\nkernel K on W {\nctrl x q[0];\n",
+                 "workspace W { qubits q[4]; lattice L(2,2) attach q;\nkernel K on W {\nctrl x q[0];\n}\n"):
+        with pytest.raises(SQUINT.ParseError, match="unbalanced braces"):
+            SQUINT.parse(code)